@@ -1,16 +1,95 @@
-import openai 
-from openai import agents 
+import asyncio
+import json
+
+import httpx
+import openai
+
 
 class Agent:
-    def __init__(self, model="gpt-3.5-turbo"):
+    def __init__(self, model="gpt-3.5-turbo", max_concurrency=8):
         self.model = model
+        # One client per agent so every request reuses the same keep-alive pool
+        self._client = openai.AsyncOpenAI(
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+            )
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
 
-    def ask(self, prompt):
-        response = openai.ChatCompletion.create(
-            model=self.model,
-            messages=[{"role": "user", "content": prompt}],
+    async def ask(self, prompt):
+        async with self._semaphore:
+            response = await self._client.chat.completions.create(
+                model=self.model,
+                messages=[{"role": "user", "content": prompt}],
+            )
+        return response.choices[0].message.content
+
+    async def aask_many(self, prompts):
+        return await asyncio.gather(*(self.ask(prompt) for prompt in prompts))
+
+    async def submit_batch(self, prompts):
+        # Non-interactive prompt lists go through the Batch API at half the cost
+        lines = [
+            json.dumps({
+                "custom_id": str(i),
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": self.model,
+                    "messages": [{"role": "user", "content": prompt}],
+                },
+            })
+            for i, prompt in enumerate(prompts)
+        ]
+        batch_file = await self._client.files.create(
+            file=("batch.jsonl", "\n".join(lines).encode()),
+            purpose="batch",
+        )
+        batch = await self._client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
         )
-        return response.choices[0].message["content"]
+        return batch.id
+
+    async def await_batch(self, batch_id, max_delay=60):
+        delay = 1
+        while True:
+            batch = await self._client.batches.retrieve(batch_id)
+            if batch.status == "completed":
+                break
+            if batch.status in ("failed", "expired", "cancelled"):
+                raise RuntimeError(f"Batch {batch_id} ended with status {batch.status}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, max_delay)
+
+        total = batch.request_counts.total
+        if batch.output_file_id is None:
+            # Every request failed; the details are only in the error file
+            return [None] * total
+
+        output = await self._client.files.content(batch.output_file_id)
+        results = {}
+        for line in output.text.splitlines():
+            if not line:
+                continue
+            item = json.loads(line)
+            response = item.get("response") or {}
+            body = response.get("body") or {}
+            choices = body.get("choices") or [{}]
+            results[int(item["custom_id"])] = choices[0].get("message", {}).get("content")
+        return [results.get(i) for i in range(total)]
+
+    async def close(self):
+        await self._client.close()
+
+    # The connection pool belongs to the event loop that first used it, so
+    # use one Agent per loop and close it before that loop ends
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
 
 
 def main():
@@ -20,6 +99,13 @@ def main():
 if __name__ == "__main__":
     main()
 
-# Example usage:
-# agent = Agent()
-# print(agent.ask("What is an OpenAI agent?"))
+# Example usage (everything runs on one event loop):
+# async def demo():
+#     async with Agent() as agent:
+#         print(await agent.ask("What is an OpenAI agent?"))
+#
+#         # Batch usage (results arrive within 24h):
+#         batch_id = await agent.submit_batch(["Prompt one", "Prompt two"])
+#         print(await agent.await_batch(batch_id))
+#
+# asyncio.run(demo())
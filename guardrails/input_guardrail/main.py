@@ -9,9 +9,12 @@ from agents import (
     input_guardrail,
 )
 import os
+import sys
 from dotenv import load_dotenv
 import asyncio
 
+from rate_limit import RateLimiter
+
 # Load environment variables if needed
 load_dotenv()
 
@@ -27,41 +30,93 @@ guardrail_agent = Agent(
     output_type=AngryInputCheck,
 )
 
-# Step 3: Create the actual guardrail decorator
+# Step 3: Cache guardrail verdicts by meaning so similar inputs skip the LLM
+# (needs the optional "cache" extra and the embedding model; if either is
+# unavailable, e.g. offline, every input is checked)
+try:
+    from cache import SemanticCache
+    guardrail_cache = SemanticCache.with_sentence_transformer()
+except Exception:
+    guardrail_cache = None
+
+# Step 4: Create the actual guardrail decorator
+# Runner.run already starts input guardrails concurrently with the main
+# agent's first turn and raises InputGuardrailTripwireTriggered as soon as
+# one trips, so this check adds no extra latency to a normal reply.
 @input_guardrail
 async def angry_guardrail(
     ctx: RunContextWrapper, agent: Agent, input: str | list[TResponseInputItem]
 ) -> GuardrailFunctionOutput:
+    embedding = None
+    if guardrail_cache is not None and isinstance(input, str):
+        # Model inference is CPU-bound, so keep it off the event loop
+        embedding = await asyncio.to_thread(guardrail_cache.embed, input)
+        cached = guardrail_cache.get(embedding)
+        if cached is not None:
+            return cached
+
     result = await Runner.run(guardrail_agent, input, context=ctx.context)
 
-    return GuardrailFunctionOutput(
+    guardrail_output = GuardrailFunctionOutput(
         output_info=result.final_output,
         tripwire_triggered=result.final_output.is_angry,
     )
+    if embedding is not None:
+        guardrail_cache.put(embedding, guardrail_output)
+    return guardrail_output
 
-# Step 4: Create the main customer support agent with input guardrail attached
+# Step 5: Create the main customer support agent with input guardrail attached
 main_agent = Agent(
     name="Customer Support Agent",
     instructions="You are a useful agent that responds in a kind and respectful manner.",
     input_guardrails=[angry_guardrail],
 )
 
-# Step 5: Run test examples
-async def run_tests():
+# Step 6: Run test examples
+# Caps concurrent test runs and their rate (OPENAI_MAX_CONCURRENCY, OPENAI_RPM)
+limiter = RateLimiter.from_env()
+
+# Each probe calls OpenAI at least twice: the guardrail agent and the main agent
+CALLS_PER_PROBE = 2
+
+async def probe(text: str) -> str | None:
     try:
-        print("\n✅ TEST 1: Polite input")
-        result = await Runner.run(main_agent, "Hi, can you please help me?")
-        print("Agent replied:", result.final_output)
+        async with limiter(cost=CALLS_PER_PROBE):
+            result = await Runner.run(main_agent, text)
+        return result.final_output
     except InputGuardrailTripwireTriggered:
+        return None
+
+async def run_tests():
+    # Both probes are independent, so run them concurrently
+    polite, angry = await asyncio.gather(
+        probe("Hi, can you please help me?"),
+        probe("Your service is stupid and terrible!"),
+        return_exceptions=True,
+    )
+
+    print("\n✅ TEST 1: Polite input")
+    if isinstance(polite, Exception):
+        print("⚠️ Error:", polite)
+    elif polite is None:
         print("🚫 Guardrail triggered on polite input (unexpected)")
+    else:
+        print("Agent replied:", polite)
 
-    try:
-        print("\n❌ TEST 2: Angry input")
-        result = await Runner.run(main_agent, "Your service is stupid and terrible!")
-        print("Agent replied (should not happen):", result.final_output)
-    except InputGuardrailTripwireTriggered:
+    print("\n❌ TEST 2: Angry input")
+    if isinstance(angry, Exception):
+        print("⚠️ Error:", angry)
+    elif angry is None:
         print("🔥 Guardrail triggered on angry input (expected)")
+    else:
+        print("Agent replied (should not happen):", angry)
 
 # Run the test async
 if __name__ == "__main__":
+    # libuv-based event loop: faster socket I/O for concurrent API calls
+    if sys.platform == "win32":
+        import winloop as uvloop
+    else:
+        import uvloop
+    uvloop.install()
     asyncio.run(run_tests())
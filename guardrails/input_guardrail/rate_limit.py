@@ -0,0 +1,94 @@
+"""
+Client-side rate limiting for API calls.
+
+Concurrent requests can burst past the account's requests-per-minute limit,
+which only turns into 429s and retries. RateLimiter bounds both how many
+calls are in flight and how fast new ones start.
+"""
+
+import asyncio
+import contextlib
+import os
+import time
+from typing import AsyncIterator
+
+
+class RateLimiter:
+    """
+    Async context manager that caps concurrency and requests per minute.
+
+    Concurrency is bounded by a semaphore; the request rate by a token
+    bucket that refills continuously at rpm / 60 tokens per second and
+    allows a burst of up to one second's worth of requests.
+
+    ``async with limiter:`` holds one concurrency slot and charges one
+    request; ``async with limiter(cost=n):`` charges n requests for work
+    that makes several API calls. Streams should hold ``limiter.slot()``
+    until fully consumed and call ``throttle()`` before each request.
+    """
+
+    def __init__(self, max_concurrency: int = 8, rpm: int = 500):
+        if max_concurrency < 1 or rpm < 1:
+            raise ValueError("max_concurrency and rpm must be at least 1")
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._rate = rpm / 60
+        self._capacity = max(1.0, self._rate)
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    def from_env(cls, prefix: str = "OPENAI") -> "RateLimiter":
+        """Build a limiter from <prefix>_MAX_CONCURRENCY and <prefix>_RPM."""
+        return cls(
+            max_concurrency=_positive_env_int(f"{prefix}_MAX_CONCURRENCY", 8),
+            rpm=_positive_env_int(f"{prefix}_RPM", 500),
+        )
+
+    def slot(self) -> asyncio.Semaphore:
+        """Concurrency slot alone, without charging a request."""
+        return self._semaphore
+
+    async def throttle(self, cost: int = 1) -> None:
+        """
+        Wait until the bucket has a token, then charge ``cost`` requests.
+
+        A cost above one may leave the bucket in debt, which later callers
+        wait out, so multi-call work never waits forever on a small bucket.
+        """
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self._capacity, self._tokens + (now - self._updated) * self._rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= cost
+                    return
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+
+    @contextlib.asynccontextmanager
+    async def __call__(self, cost: int = 1) -> AsyncIterator["RateLimiter"]:
+        async with self._semaphore:
+            await self.throttle(cost)
+            yield self
+
+    async def __aenter__(self) -> "RateLimiter":
+        await self._semaphore.acquire()
+        try:
+            await self.throttle()
+        except BaseException:
+            self._semaphore.release()
+            raise
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self._semaphore.release()
+
+
+def _positive_env_int(name: str, default: int) -> int:
+    value = int(os.getenv(name, str(default)))
+    if value < 1:
+        raise ValueError(f"{name} must be at least 1, got {value}")
+    return value
@@ -1,16 +1,57 @@
+import asyncio
+import contextlib
 import google.generativeai as genai
+from cachetools import LFUCache
 from typing import Any, Dict, Optional
 from openai_agents.models.base import BaseModelProvider
 
 class GeminiProvider(BaseModelProvider):
-    def __init__(self, api_key: str, base_url: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: str,
+        base_url: Optional[str] = None,
+        cache_size: int = 50_000,
+        limiter: Optional[Any] = None,
+    ):
         self.api_key = api_key
+        # Optional async context manager (e.g. RateLimiter) around each Gemini call
+        self._limiter = limiter or contextlib.nullcontext()
         genai.configure(api_key=api_key)
         self.model = genai.GenerativeModel('gemini-pro')
+        # Guardrail checks are deterministic enough that identical prompts
+        # can reuse the previous response instead of calling Gemini again
+        self._cache: LFUCache = LFUCache(maxsize=cache_size)
+        self._cache_lock = asyncio.Lock()
+        self._hits = 0
+        self._misses = 0
+    
+    @staticmethod
+    def _cache_key(prompt: str) -> str:
+        return " ".join(prompt.split()).lower()
     
     async def generate(self, prompt: str, **kwargs) -> str:
-        response = self.model.generate_content(prompt)
+        key = self._cache_key(prompt)
+        async with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._hits += 1
+                return cached
+            self._misses += 1
+        
+        async with self._limiter:
+            response = await self.model.generate_content_async(prompt)
+        
+        async with self._cache_lock:
+            self._cache[key] = response.text
         return response.text
     
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "size": len(self._cache),
+            "maxsize": self._cache.maxsize,
+        }
+    
     def get_model_name(self) -> str:
-        return "gemini/gemini-pro" 
\ No newline at end of file
+        return "gemini/gemini-pro"
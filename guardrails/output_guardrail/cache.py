@@ -0,0 +1,81 @@
+"""
+Semantic cache for guardrail results.
+
+Inputs that mean the same thing ("this is terrible" / "your service sucks")
+get the same guardrail verdict, so results are cached by sentence embedding
+and reused when a new input is similar enough to a cached one.
+"""
+
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+
+class SemanticCache:
+    def __init__(
+        self,
+        embedder: Callable[[str], np.ndarray],
+        threshold: float = 0.92,
+        maxsize: int = 10_000,
+    ):
+        self.embedder = embedder
+        self.threshold = threshold
+        self.maxsize = maxsize
+        # Unit-length embeddings, one row per entry, so cosine similarity
+        # against every entry is a single matrix-vector product
+        self._matrix: Optional[np.ndarray] = None
+        self._values: list[Any] = []
+        # Per-entry hit counts; the least frequently used entry is evicted
+        self._uses = np.zeros(maxsize, dtype=np.int64)
+        self._hits = 0
+        self._misses = 0
+
+    @classmethod
+    def with_sentence_transformer(
+        cls, model_name: str = "sentence-transformers/all-MiniLM-L6-v2", **kwargs
+    ) -> "SemanticCache":
+        from sentence_transformers import SentenceTransformer
+
+        model = SentenceTransformer(model_name)
+        return cls(lambda text: model.encode(text), **kwargs)
+
+    def embed(self, text: str) -> np.ndarray:
+        vector = np.asarray(self.embedder(text), dtype=np.float32)
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+    def get(self, embedding: np.ndarray) -> Optional[Any]:
+        if not self._values:
+            self._misses += 1
+            return None
+
+        scores = self._matrix[: len(self._values)] @ embedding
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            self._misses += 1
+            return None
+
+        self._hits += 1
+        self._uses[best] += 1
+        return self._values[best]
+
+    def put(self, embedding: np.ndarray, value: Any) -> None:
+        if self._matrix is None:
+            self._matrix = np.empty((self.maxsize, embedding.shape[0]), dtype=np.float32)
+
+        if len(self._values) < self.maxsize:
+            index = len(self._values)
+            self._values.append(value)
+        else:
+            index = int(np.argmin(self._uses))
+            self._values[index] = value
+
+        self._matrix[index] = embedding
+        self._uses[index] = 0
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "size": len(self._values),
+            "maxsize": self.maxsize,
+        }
@@ -10,9 +10,12 @@ from agents import (
 )
 from agents.models.gemini_provider import GeminiProvider
 import os
+import sys
 from dotenv import load_dotenv
 import asyncio
 
+from rate_limit import RateLimiter
+
 # Load environment variables
 load_dotenv()
 
@@ -20,6 +23,7 @@ load_dotenv()
 gemini_provider = GeminiProvider(
     api_key=os.getenv("GEMINI_API_KEY"),
     base_url="https://generativelanguage.googleapis.com",
+    limiter=RateLimiter.from_env("GEMINI"),
 )
 
 # Step 2: Define output format
@@ -36,42 +40,92 @@ guardrail_agent = Agent(
     model_provider=gemini_provider,
 )
 
-# Step 4: Guardrail function
+# Step 4: Cache guardrail verdicts by meaning so similar responses skip the LLM
+# (needs the optional "cache" extra and the embedding model; if either is
+# unavailable, e.g. offline, every response is checked)
+try:
+    from cache import SemanticCache
+    guardrail_cache = SemanticCache.with_sentence_transformer()
+except Exception:
+    guardrail_cache = None
+
+# Step 5: Guardrail function
 @output_guardrail
 async def kindness_guardrail(
     ctx: RunContextWrapper[None], agent: Agent, input: str | list[TResponseInputItem], output: str
 ) -> GuardrailFunctionOutput:
+    embedding = None
+    if guardrail_cache is not None:
+        # Model inference is CPU-bound, so keep it off the event loop
+        embedding = await asyncio.to_thread(guardrail_cache.embed, output)
+        cached = guardrail_cache.get(embedding)
+        if cached is not None:
+            return cached
+
     result = await Runner.run(guardrail_agent, output, context=ctx.context)
-    return GuardrailFunctionOutput(
+    guardrail_output = GuardrailFunctionOutput(
         output_info=result.final_output,
         tripwire_triggered=result.final_output.is_mean,
     )
+    if embedding is not None:
+        guardrail_cache.put(embedding, guardrail_output)
+    return guardrail_output
 
-# Step 5: Main agent (OpenAI will be used by default)
+# Step 6: Main agent (OpenAI will be used by default)
 main_agent = Agent(
     name="Helpful Agent",
     instructions="Respond kindly to user input with compassion and helpfulness.",
     output_guardrails=[kindness_guardrail],
 )
 
-# Step 6: Testing
-async def run_tests():
+# Step 7: Testing
+# Caps concurrent test runs and their rate (OPENAI_MAX_CONCURRENCY, OPENAI_RPM)
+limiter = RateLimiter.from_env()
+
+# Each probe makes two model calls: the main agent's call goes to OpenAI and
+# is charged here, while the guardrail agent's call goes through
+# gemini_provider and is charged by its own GEMINI_* limiter
+CALLS_PER_PROBE = 1
+
+async def probe(text: str) -> str | None:
     try:
-        print("\n✅ TEST 1: Kind response")
-        result = await Runner.run(main_agent, "Hi, how can I reset my password?")
-        print("Agent replied:", result.final_output)
+        async with limiter(cost=CALLS_PER_PROBE):
+            result = await Runner.run(main_agent, text)
+        return result.final_output
     except OutputGuardrailTripwireTriggered:
+        return None
+
+async def run_tests():
+    # Both probes are independent, so run them concurrently
+    kind, rude = await asyncio.gather(
+        probe("Hi, how can I reset my password?"),
+        probe("How do I fix this?"),
+        return_exceptions=True,
+    )
+
+    print("\n✅ TEST 1: Kind response")
+    if isinstance(kind, Exception):
+        print("⚠️ Error:", kind)
+    elif kind is None:
         print("🚫 Guardrail triggered (unexpected)")
+    else:
+        print("Agent replied:", kind)
 
-    try:
-        print("\n❌ TEST 2: Rude response simulation")
-        rude_response = "Figure it out yourself. I'm not here to babysit you."
-        result = await Runner.run(main_agent, "How do I fix this?")
-        result.final_output = rude_response  # simulate a bad response
-        print("Agent replied:", result.final_output)
-    except OutputGuardrailTripwireTriggered:
+    print("\n❌ TEST 2: Rude response simulation")
+    if isinstance(rude, Exception):
+        print("⚠️ Error:", rude)
+    elif rude is None:
         print("🔥 Guardrail triggered on rude output (expected)")
+    else:
+        rude = "Figure it out yourself. I'm not here to babysit you."  # simulate a bad response
+        print("Agent replied:", rude)
 
 # Run test
 if __name__ == "__main__":
+    # libuv-based event loop: faster socket I/O for concurrent API calls
+    if sys.platform == "win32":
+        import winloop as uvloop
+    else:
+        import uvloop
+    uvloop.install()
     asyncio.run(run_tests())
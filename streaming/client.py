@@ -0,0 +1,47 @@
+"""
+Shared OpenAI client for the streaming examples.
+
+Every demo goes through the same AsyncOpenAI instance, so concurrent and
+back-to-back streams reuse one pool of warm HTTP/2 connections instead of
+each opening its own.
+"""
+
+import functools
+import os
+import sys
+
+import httpx
+import openai
+
+
+@functools.cache
+def get_client() -> openai.AsyncOpenAI:
+    """
+    Return the process-wide AsyncOpenAI client, creating it on first use.
+
+    Creation is deferred so callers can check OPENAI_API_KEY first. The
+    client must be used from a single event loop and closed with
+    ``await get_client().close()`` before that loop shuts down.
+    """
+    return openai.AsyncOpenAI(
+        api_key=os.getenv("OPENAI_API_KEY"),
+        # Retries are handled by retry.async_retry; stacking the SDK's own
+        # retries on top would multiply the attempts per call
+        max_retries=0,
+        http_client=httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=10),
+        ),
+    )
+
+
+def install_event_loop() -> None:
+    """
+    Switch asyncio to the libuv-based event loop (uvloop, or winloop on
+    Windows) for faster socket I/O. Call once, before the loop is created.
+    """
+    if sys.platform == "win32":
+        import winloop as uvloop
+    else:
+        import uvloop
+    uvloop.install()
@@ -10,25 +10,122 @@ This project demonstrates various streaming concepts with the OpenAI API:
 """
 
 import asyncio
+import contextlib
+import io
 import os
+import re
 import sys
+import time
 from typing import AsyncGenerator, Dict, Any
 from dotenv import load_dotenv
+import ijson
 from rich.console import Console
 from rich.panel import Panel
-from rich.text import Text
-from rich.progress import Progress, SpinnerColumn, TextColumn
-from rich.live import Live
-from rich.layout import Layout
-from rich.table import Table
 import openai
 
+from client import get_client, install_event_loop
+from rate_limit import RateLimiter
+from retry import async_retry
+from writer import CYAN, GREEN, StreamWriter
+
 # Load environment variables
 load_dotenv()
 
 # Initialize Rich console for beautiful output
 console = Console()
 
+# Maximum number of demos streaming from the API at the same time
+MAX_CONCURRENT_DEMOS = 4
+
+# Patterns used for the real-time statistics
+_SENT_RE = re.compile(r'[.!?]')
+_WORD_RE = re.compile(r'\S+')
+
+# Minimum seconds between live display updates (matches refresh_per_second=4)
+_DISPLAY_INTERVAL = 0.25
+
+# Function the model can call in the function calling demo (built once and
+# reused for every request)
+_WEATHER_FUNCTIONS = [
+    {
+        "type": "function",
+        "function": {
+            "name": "get_weather",
+            "description": "Get the current weather for a location",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "location": {
+                        "type": "string",
+                        "description": "The city and state, e.g. San Francisco, CA"
+                    },
+                    "unit": {
+                        "type": "string",
+                        "enum": ["celsius", "fahrenheit"],
+                        "description": "The temperature unit to use"
+                    }
+                },
+                "required": ["location"]
+            }
+        }
+    }
+]
+
+def _token_writer(console: Console, color: str) -> StreamWriter:
+    """
+    Write streamed tokens straight to a console's file, skipping Rich's
+    markup parsing. The colour is dropped when the console has none.
+    """
+    return StreamWriter(console.file, color if console.color_system is not None else None)
+
+def _print_token_rate(console: Console, tokens: int, elapsed: float) -> None:
+    """Print a one-line throughput summary after a stream finishes."""
+    rate = tokens / elapsed if elapsed > 0 else 0.0
+    console.print(f"\n\n[dim]({tokens} tokens in {elapsed:.1f}s, {rate:.0f} tok/s)[/dim]")
+
+class _ArgumentStream:
+    """
+    Incrementally parses a function call's JSON arguments as they stream in.
+    
+    Fragments are queued by feed() and consumed by ijson in a background
+    task, which calls on_value(path, value) for every scalar argument as
+    soon as it is complete, before the rest of the call has arrived.
+    """
+    
+    _SCALAR_EVENTS = {"string", "number", "boolean", "null"}
+    
+    def __init__(self, on_value) -> None:
+        self._queue: asyncio.Queue[bytes] = asyncio.Queue()
+        self._task = asyncio.create_task(self._parse(on_value))
+    
+    def feed(self, fragment: str) -> None:
+        if fragment:
+            self._queue.put_nowait(fragment.encode())
+    
+    async def read(self, size: int = -1) -> bytes:
+        # File-like interface for ijson, which probes with read(0) to detect
+        # bytes vs text; otherwise an empty chunk signals end of input
+        if size == 0:
+            return b""
+        return await self._queue.get()
+    
+    async def close(self) -> None:
+        self._queue.put_nowait(b"")
+        await self._task
+    
+    def cancel(self) -> None:
+        # For when the stream fails before close(); no-op once parsing is done
+        self._task.cancel()
+    
+    async def _parse(self, on_value) -> None:
+        try:
+            async for prefix, event, value in ijson.parse_async(self):
+                if event in self._SCALAR_EVENTS:
+                    on_value(prefix, value)
+        except ijson.JSONError:
+            # Malformed arguments are still shown raw once the stream ends
+            pass
+
 class StreamingDemo:
     """Main class for demonstrating OpenAI SDK streaming capabilities."""
     
@@ -41,10 +138,30 @@ class StreamingDemo:
             console.print("OPENAI_API_KEY=your_api_key_here")
             sys.exit(1)
         
-        self.client = openai.AsyncOpenAI(api_key=api_key)
+        self.client = get_client()
         self.model = "gpt-3.5-turbo"
+        self._limiter = RateLimiter.from_env()
+    
+    @async_retry()
+    async def _create_completion(self, **kwargs):
+        """Create a chat completion, retrying on rate limits and connection errors."""
+        await self._limiter.throttle()
+        return await self.client.chat.completions.create(**kwargs)
+    
+    @contextlib.asynccontextmanager
+    async def _open_stream(self, **kwargs):
+        """
+        Open a streamed chat completion, holding a concurrency slot until the
+        stream has been consumed and closed.
+        """
+        async with self._limiter.slot():
+            stream = await self._create_completion(stream=True, **kwargs)
+            try:
+                yield stream
+            finally:
+                await stream.close()
     
-    async def basic_streaming_demo(self) -> None:
+    async def basic_streaming_demo(self, console: Console = console) -> None:
         """Demonstrate basic chat completion streaming."""
         console.print(Panel.fit(
             "[bold blue]Basic Streaming Demo[/bold blue]\n"
@@ -57,30 +174,33 @@ class StreamingDemo:
             {"role": "user", "content": "Write a short story about a robot learning to paint. Make it about 3 paragraphs."}
         ]
         
-        full_response = ""
+        parts: list[str] = []
         
         try:
-            stream = await self.client.chat.completions.create(
+            async with self._open_stream(
                 model=self.model,
                 messages=messages,
-                stream=True,
                 max_tokens=500
-            )
+            ) as stream:
+                # The tokens themselves are the progress indicator, so write them
+                # straight to the console file without a spinner or markup parsing
+                started = time.monotonic()
+                with _token_writer(console, GREEN) as writer:
+                    async for chunk in stream:
+                        if chunk.choices[0].delta.content is not None:
+                            content = chunk.choices[0].delta.content
+                            parts.append(content)
+                            writer.write(content)
             
-            with console.status("[bold green]Streaming response...", spinner="dots"):
-                async for chunk in stream:
-                    if chunk.choices[0].delta.content is not None:
-                        content = chunk.choices[0].delta.content
-                        full_response += content
-                        console.print(content, end="", style="green")
-            
-            console.print("\n\n[bold]Full response collected:[/bold]")
+            full_response = "".join(parts)
+            _print_token_rate(console, len(parts), time.monotonic() - started)
+            console.print("\n[bold]Full response collected:[/bold]")
             console.print(Panel(full_response, title="Complete Response"))
             
         except Exception as e:
             console.print(f"[red]Error during streaming: {e}[/red]")
     
-    async def function_calling_streaming_demo(self) -> None:
+    async def function_calling_streaming_demo(self, console: Console = console) -> None:
         """Demonstrate function calling with streaming."""
         console.print(Panel.fit(
             "[bold blue]Function Calling with Streaming[/bold blue]\n"
@@ -88,66 +208,61 @@ class StreamingDemo:
             title="Demo 2: Function Calling"
         ))
         
-        # Define a function that the model can call
-        functions = [
-            {
-                "type": "function",
-                "function": {
-                    "name": "get_weather",
-                    "description": "Get the current weather for a location",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "location": {
-                                "type": "string",
-                                "description": "The city and state, e.g. San Francisco, CA"
-                            },
-                            "unit": {
-                                "type": "string",
-                                "enum": ["celsius", "fahrenheit"],
-                                "description": "The temperature unit to use"
-                            }
-                        },
-                        "required": ["location"]
-                    }
-                }
-            }
-        ]
-        
         messages = [
             {"role": "user", "content": "What's the weather like in New York? Please use Celsius."}
         ]
         
         try:
-            stream = await self.client.chat.completions.create(
+            async with self._open_stream(
                 model=self.model,
                 messages=messages,
-                functions=functions,
-                stream=True
-            )
+                functions=_WEATHER_FUNCTIONS
+            ) as stream:
+                function_calls = []
+                content_parts = []
+                token_count = 0
+                argument_stream = None
             
-            function_calls = []
-            content_parts = []
+                def on_argument(path: str, value: Any) -> None:
+                    console.print(f"\n[dim]  argument {path} = {value!r}[/dim]", end="")
             
-            with console.status("[bold green]Streaming with function calls...", spinner="dots"):
-                async for chunk in stream:
-                    if chunk.choices[0].delta.content is not None:
-                        content = chunk.choices[0].delta.content
-                        content_parts.append(content)
-                        console.print(content, end="", style="cyan")
-                    
-                    if chunk.choices[0].delta.function_call is not None:
-                        function_call = chunk.choices[0].delta.function_call
-                        if function_call.name:
-                            function_calls.append({
-                                "name": function_call.name,
-                                "arguments": function_call.arguments or ""
-                            })
-                        elif function_call.arguments:
-                            if function_calls:
-                                function_calls[-1]["arguments"] += function_call.arguments
+                started = time.monotonic()
+                try:
+                    with _token_writer(console, CYAN) as writer:
+                        async for chunk in stream:
+                            if chunk.choices[0].delta.content is not None:
+                                content = chunk.choices[0].delta.content
+                                content_parts.append(content)
+                                token_count += 1
+                                writer.write(content)
+                
+                            if chunk.choices[0].delta.function_call is not None:
+                                function_call = chunk.choices[0].delta.function_call
+                                token_count += 1
+                                if function_call.name:
+                                    if argument_stream is not None:
+                                        await argument_stream.close()
+                                    argument_stream = _ArgumentStream(on_argument)
+                                    argument_stream.feed(function_call.arguments or "")
+                                    function_calls.append({
+                                        "name": function_call.name,
+                                        "arguments": function_call.arguments or ""
+                                    })
+                                elif function_call.arguments:
+                                    if function_calls:
+                                        argument_stream.feed(function_call.arguments)
+                                        function_calls[-1]["arguments"] += function_call.arguments
             
-            console.print("\n\n[bold]Function calls detected:[/bold]")
+                    if argument_stream is not None:
+                        await argument_stream.close()
+                finally:
+                    # Don't leave the parser task waiting on its queue if
+                    # the stream raised partway through
+                    if argument_stream is not None:
+                        argument_stream.cancel()
+            
+            _print_token_rate(console, token_count, time.monotonic() - started)
+            console.print("\n[bold]Function calls detected:[/bold]")
             for func_call in function_calls:
                 console.print(Panel(
                     f"Function: {func_call['name']}\nArguments: {func_call['arguments']}",
@@ -157,7 +272,7 @@ class StreamingDemo:
         except Exception as e:
             console.print(f"[red]Error during function calling: {e}[/red]")
     
-    async def real_time_processing_demo(self) -> None:
+    async def real_time_processing_demo(self, console: Console = console) -> None:
         """Demonstrate real-time processing of streamed content."""
         console.print(Panel.fit(
             "[bold blue]Real-time Processing Demo[/bold blue]\n"
@@ -165,62 +280,86 @@ class StreamingDemo:
             title="Demo 3: Real-time Processing"
         ))
         
+        # Only this demo needs the live display widgets, so import them here
+        # rather than at startup
+        from rich.layout import Layout
+        from rich.live import Live
+        from rich.table import Table
+        from rich.text import Text
+        
         messages = [
             {"role": "user", "content": "List the top 5 programming languages and explain why they're popular. Format as a numbered list."}
         ]
         
         word_count = 0
         sentence_count = 0
-        current_sentence = ""
+        # Streamed text is appended to the Text shown by the content panel
+        current_sentence = Text()
+        # Trailing partial word carried over so words split across chunks count once
+        word_tail = ""
         
-        # Create a live display
-        layout = Layout()
-        layout.split_column(
-            Layout(name="stats", size=3),
-            Layout(name="content", ratio=1)
-        )
+        # The table and panel are built once; updates only touch these cells
+        words_cell = Text("0")
+        sentences_cell = Text("0")
+        characters_cell = Text("0")
         
         stats_table = Table(title="Real-time Statistics")
         stats_table.add_column("Metric", style="cyan")
         stats_table.add_column("Count", style="green")
+        stats_table.add_row("Words", words_cell)
+        stats_table.add_row("Sentences", sentences_cell)
+        stats_table.add_row("Characters", characters_cell)
         
-        content_panel = Panel("", title="Streaming Content")
+        content_panel = Panel(current_sentence, title="Streaming Content")
+        
+        # Create a live display
+        layout = Layout()
+        layout.split_column(
+            Layout(stats_table, name="stats", size=8),
+            Layout(content_panel, name="content", ratio=1)
+        )
+        
+        def update_display() -> None:
+            words_cell.plain = str(word_count + (1 if word_tail else 0))
+            sentences_cell.plain = str(sentence_count)
+            characters_cell.plain = str(len(current_sentence))
         
         try:
-            stream = await self.client.chat.completions.create(
+            async with self._open_stream(
                 model=self.model,
                 messages=messages,
-                stream=True,
                 max_tokens=400
-            )
-            
-            with Live(layout, refresh_per_second=4):
-                async for chunk in stream:
-                    if chunk.choices[0].delta.content is not None:
-                        content = chunk.choices[0].delta.content
-                        current_sentence += content
-                        word_count += len(content.split())
-                        
-                        # Count sentences (simple heuristic)
-                        if any(punct in content for punct in '.!?'):
-                            sentence_count += content.count('.') + content.count('!') + content.count('?')
+            ) as stream:
+                with Live(layout, console=console, refresh_per_second=4):
+                    last_update = 0.0
+                    async for chunk in stream:
+                        if chunk.choices[0].delta.content is not None:
+                            content = chunk.choices[0].delta.content
+                            current_sentence.append(content)
                         
-                        # Update the live display
-                        stats_table.rows = [
-                            ["Words", str(word_count)],
-                            ["Sentences", str(sentence_count)],
-                            ["Characters", str(len(current_sentence))]
-                        ]
+                            text = word_tail + content
+                            words = _WORD_RE.findall(text)
+                            if words and not text[-1].isspace():
+                                word_tail = words.pop()
+                            else:
+                                word_tail = ""
+                            word_count += len(words)
                         
-                        layout["stats"].update(stats_table)
-                        layout["content"].update(Panel(current_sentence, title="Streaming Content"))
+                            # Count sentences (simple heuristic)
+                            sentence_count += len(_SENT_RE.findall(content))
                         
-                        await asyncio.sleep(0.01)  # Small delay for smooth display
+                            # Only rebuild the display as often as Live refreshes it
+                            now = time.monotonic()
+                            if now - last_update >= _DISPLAY_INTERVAL:
+                                update_display()
+                                last_update = now
+                
+                    update_display()
                         
         except Exception as e:
             console.print(f"[red]Error during real-time processing: {e}[/red]")
     
-    async def error_handling_demo(self) -> None:
+    async def error_handling_demo(self, console: Console = console) -> None:
         """Demonstrate error handling in streaming."""
         console.print(Panel.fit(
             "[bold blue]Error Handling Demo[/bold blue]\n"
@@ -252,7 +391,15 @@ class StreamingDemo:
             console.print("[green]No errors occurred[/green]")
     
     async def run_all_demos(self) -> None:
-        """Run all streaming demos in sequence."""
+        """
+        Run the streaming demos and print their output in order.
+        
+        The basic, function calling and error handling demos run concurrently,
+        each rendering into its own buffered console so their streams don't
+        interleave; their output is replayed once they finish, so it is not
+        shown live. The real-time processing demo drives a Live display, so it
+        runs afterwards on the real console.
+        """
         console.print(Panel.fit(
             "[bold magenta]OpenAI SDK Streaming Demo[/bold magenta]\n"
             "This project demonstrates various streaming concepts with the OpenAI API",
@@ -265,10 +412,43 @@ class StreamingDemo:
             self.real_time_processing_demo,
             self.error_handling_demo
         ]
+        live_demos = {self.real_time_processing_demo}
+        buffered_demos = [demo for demo in demos if demo not in live_demos]
+        
+        # Buffers mirror the real console so redirected output stays plain text
+        buffers = {
+            demo: Console(
+                file=io.StringIO(),
+                force_terminal=console.is_terminal,
+                color_system=console.color_system,
+                width=console.width
+            )
+            for demo in buffered_demos
+        }
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_DEMOS)
+        
+        async def run_demo(demo, demo_console: Console) -> None:
+            async with semaphore:
+                await demo(console=demo_console)
+        
+        with console.status("[bold green]Running demos concurrently...", spinner="dots"):
+            results = await asyncio.gather(
+                *(run_demo(demo, buffers[demo]) for demo in buffered_demos),
+                return_exceptions=True
+            )
+        errors = dict(zip(buffered_demos, results))
         
         for i, demo in enumerate(demos, 1):
             console.print(f"\n[bold]Demo {i}/{len(demos)}[/bold]")
-            await demo()
+            if demo in live_demos:
+                try:
+                    await demo()
+                except Exception as e:
+                    errors[demo] = e
+            else:
+                console.file.write(buffers[demo].file.getvalue())
+            if isinstance(errors.get(demo), Exception):
+                console.print(f"[red]Demo failed: {errors[demo]}[/red]")
             console.print("\n" + "="*50 + "\n")
         
         console.print(Panel.fit(
@@ -280,7 +460,11 @@ class StreamingDemo:
 async def main():
     """Main entry point for the streaming demo."""
     demo = StreamingDemo()
-    await demo.run_all_demos()
+    try:
+        await demo.run_all_demos()
+    finally:
+        await demo.client.close()
 
 if __name__ == "__main__":
+    install_event_loop()
     asyncio.run(main())
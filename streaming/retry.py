@@ -0,0 +1,60 @@
+"""
+Retry helpers for OpenAI API calls.
+
+Rate limits (429) and dropped connections are transient, so calls that hit
+them are retried with exponential backoff and jitter. Errors that will not
+go away on their own (bad requests, invalid credentials) are raised
+immediately.
+"""
+
+import asyncio
+import functools
+import random
+from typing import Awaitable, Callable, Optional, TypeVar
+
+import openai
+
+T = TypeVar("T")
+
+# Errors worth retrying; everything else propagates on the first attempt
+RETRYABLE_ERRORS = (openai.RateLimitError, openai.APIConnectionError)
+
+# Longest Retry-After delay honoured, so a large server value can't stall a demo
+MAX_RETRY_AFTER = 30.0
+
+
+def default_backoff(attempt: int) -> float:
+    """Exponential backoff capped at 30 seconds, plus up to 1 second of jitter."""
+    return min(30, 2 ** attempt) + random.random()
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Return the server's Retry-After delay in seconds (capped), if it sent one."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    value = response.headers.get("retry-after")
+    try:
+        return min(float(value), MAX_RETRY_AFTER) if value else None
+    except ValueError:
+        return None
+
+
+def async_retry(
+    retries: int = 5,
+    backoff: Callable[[int], float] = default_backoff,
+) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+    """Retry an async function on rate limit and connection errors."""
+    def decorator(func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs) -> T:
+            for attempt in range(retries + 1):
+                try:
+                    return await func(*args, **kwargs)
+                except RETRYABLE_ERRORS as e:
+                    if attempt == retries:
+                        raise
+                    delay = _retry_after(e)
+                    await asyncio.sleep(delay if delay is not None else backoff(attempt))
+        return wrapper
+    return decorator
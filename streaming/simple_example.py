@@ -7,20 +7,89 @@ with the OpenAI SDK. Perfect for getting started with streaming concepts.
 """
 
 import asyncio
+import contextlib
 import os
+import threading
 from dotenv import load_dotenv
-import openai
+
+from client import get_client, install_event_loop
+from rate_limit import RateLimiter
+from retry import async_retry
+from writer import StreamWriter
 
 # Load environment variables
 load_dotenv()
 
-async def simple_streaming():
+# Caps concurrency and requests per minute (OPENAI_MAX_CONCURRENCY, OPENAI_RPM)
+limiter = RateLimiter.from_env()
+
+@async_retry()
+async def create_completion(client, **kwargs):
     """
-    Basic streaming example - the simplest way to get started with streaming.
+    Create a chat completion, retrying on rate limits and connection errors.
     """
-    # Initialize the OpenAI client
-    client = openai.AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    await limiter.throttle()
+    return await client.chat.completions.create(**kwargs)
+
+@contextlib.asynccontextmanager
+async def open_stream(client, **kwargs):
+    """
+    Open a streaming chat completion. The limiter's concurrency slot is held
+    until the stream has been read and closed, not just until it starts.
+    """
+    async with limiter.slot():
+        stream = await create_completion(client, **kwargs)
+        try:
+            yield stream
+        finally:
+            await stream.close()
+
+async def ainput(prompt):
+    """
+    Read a line from stdin without blocking the event loop.
+    
+    input() runs on a daemon thread rather than in the default executor, so
+    an abandoned read (e.g. after Ctrl-C) doesn't keep the program alive.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    
+    def resolve(result, error):
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+    
+    def read():
+        try:
+            result, error = input(prompt), None
+        except Exception as e:
+            result, error = None, e
+        try:
+            loop.call_soon_threadsafe(resolve, result, error)
+        except RuntimeError:
+            pass  # The loop has already closed
     
+    threading.Thread(target=read, daemon=True).start()
+    return await future
+
+async def prewarm(client):
+    """
+    Open a connection to the API while the user is typing, so the first
+    request starts on a warm TLS connection. Failures are ignored.
+    """
+    try:
+        async with limiter:
+            await client.models.retrieve("gpt-3.5-turbo")
+    except Exception:
+        pass
+
+async def simple_streaming(client):
+    """
+    Basic streaming example - the simplest way to get started with streaming.
+    """
     # Define your conversation
     messages = [
         {"role": "user", "content": "Tell me a short joke about programming."}
@@ -31,18 +100,20 @@ async def simple_streaming():
     
     try:
         # Create a streaming request
-        stream = await client.chat.completions.create(
+        async with open_stream(
+            client,
             model="gpt-3.5-turbo",
             messages=messages,
             stream=True  # This is the key parameter for streaming
-        )
-        
-        # Process the stream chunk by chunk
-        async for chunk in stream:
-            # Check if there's content in this chunk
-            if chunk.choices[0].delta.content is not None:
-                # Print the content immediately (real-time)
-                print(chunk.choices[0].delta.content, end="", flush=True)
+        ) as stream:
+            # Process the stream chunk by chunk
+            writer = StreamWriter()
+            async for chunk in stream:
+                # Check if there's content in this chunk
+                if chunk.choices[0].delta.content is not None:
+                    # Write the content as it arrives (real-time)
+                    writer.write(chunk.choices[0].delta.content)
+            writer.flush()
         
         print("\n" + "-" * 40)
         print("✅ Streaming complete!")
@@ -50,13 +121,11 @@ async def simple_streaming():
     except Exception as e:
         print(f"❌ Error: {e}")
 
-async def streaming_with_collection():
+async def streaming_with_collection(client):
     """
     Example that collects the full response while streaming.
     Useful when you need both real-time display and the complete text.
     """
-    client = openai.AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    
     messages = [
         {"role": "user", "content": "Write a haiku about artificial intelligence."}
     ]
@@ -64,21 +133,24 @@ async def streaming_with_collection():
     print("🎯 Streaming with Collection:")
     print("-" * 40)
     
-    full_response = ""
+    parts: list[str] = []
     
     try:
-        stream = await client.chat.completions.create(
+        async with open_stream(
+            client,
             model="gpt-3.5-turbo",
             messages=messages,
             stream=True
-        )
-        
-        async for chunk in stream:
-            if chunk.choices[0].delta.content is not None:
-                content = chunk.choices[0].delta.content
-                full_response += content
-                print(content, end="", flush=True)
+        ) as stream:
+            writer = StreamWriter()
+            async for chunk in stream:
+                if chunk.choices[0].delta.content is not None:
+                    content = chunk.choices[0].delta.content
+                    parts.append(content)
+                    writer.write(content)
+            writer.flush()
         
+        full_response = "".join(parts)
         print("\n" + "-" * 40)
         print("📝 Complete response:")
         print(full_response)
@@ -86,52 +158,61 @@ async def streaming_with_collection():
     except Exception as e:
         print(f"❌ Error: {e}")
 
-async def interactive_streaming():
+async def interactive_streaming(client):
     """
     Interactive streaming example - ask user for input and stream the response.
     """
-    client = openai.AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    
     print("💬 Interactive Streaming Demo")
     print("Type 'quit' to exit")
     print("-" * 40)
     
     conversation_history = []
     
-    while True:
-        # Get user input
-        user_input = input("\n👤 You: ")
-        
-        if user_input.lower() in ['quit', 'exit', 'bye']:
-            print("👋 Goodbye!")
-            break
-        
-        # Add user message to conversation
-        conversation_history.append({"role": "user", "content": user_input})
-        
-        print("🤖 AI: ", end="", flush=True)
-        
-        try:
-            # Stream the response
-            stream = await client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=conversation_history,
-                stream=True
-            )
+    # Warm up the connection once while the user types their first message;
+    # after that, the previous response keeps the pool warm
+    warmup = asyncio.create_task(prewarm(client))
+    
+    try:
+        while True:
+            # Get user input
+            user_input = await ainput("\n👤 You: ")
             
-            response_content = ""
+            if user_input.lower() in ['quit', 'exit', 'bye']:
+                print("👋 Goodbye!")
+                break
             
-            async for chunk in stream:
-                if chunk.choices[0].delta.content is not None:
-                    content = chunk.choices[0].delta.content
-                    response_content += content
-                    print(content, end="", flush=True)
+            # Add user message to conversation
+            conversation_history.append({"role": "user", "content": user_input})
             
-            # Add AI response to conversation history
-            conversation_history.append({"role": "assistant", "content": response_content})
+            print("🤖 AI: ", end="", flush=True)
             
-        except Exception as e:
-            print(f"\n❌ Error: {e}")
+            try:
+                # Stream the response
+                async with open_stream(
+                    client,
+                    model="gpt-3.5-turbo",
+                    messages=conversation_history,
+                    stream=True
+                ) as stream:
+                    parts: list[str] = []
+                
+                    writer = StreamWriter()
+                    async for chunk in stream:
+                        if chunk.choices[0].delta.content is not None:
+                            content = chunk.choices[0].delta.content
+                            parts.append(content)
+                            writer.write(content)
+                    writer.flush()
+                
+                response_content = "".join(parts)
+                
+                # Add AI response to conversation history
+                conversation_history.append({"role": "assistant", "content": response_content})
+                
+            except Exception as e:
+                print(f"\n❌ Error: {e}")
+    finally:
+        warmup.cancel()
 
 def main():
     """
@@ -154,19 +235,31 @@ def main():
         ("Interactive Streaming", interactive_streaming)
     ]
     
-    for i, (name, example_func) in enumerate(examples, 1):
-        print(f"\n{i}. {name}")
-        print("Press Enter to run this example...")
-        input()
-        
-        try:
-            asyncio.run(example_func())
-        except KeyboardInterrupt:
-            print("\n⏹️  Example interrupted by user")
-        except Exception as e:
-            print(f"\n❌ Error running example: {e}")
-        
-        print("\n" + "=" * 50)
+    # All examples share one client, so run them on a single event loop
+    client = get_client()
+    loop = asyncio.new_event_loop()
+    
+    try:
+        for i, (name, example_func) in enumerate(examples, 1):
+            print(f"\n{i}. {name}")
+            print("Press Enter to run this example...")
+            input()
+            
+            task = loop.create_task(example_func(client))
+            try:
+                loop.run_until_complete(task)
+            except KeyboardInterrupt:
+                task.cancel()
+                loop.run_until_complete(asyncio.gather(task, return_exceptions=True))
+                print("\n⏹️  Example interrupted by user")
+            except Exception as e:
+                print(f"\n❌ Error running example: {e}")
+            
+            print("\n" + "=" * 50)
+    finally:
+        loop.run_until_complete(client.close())
+        loop.close()
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    install_event_loop()
+    main()
\ No newline at end of file
@@ -0,0 +1,53 @@
+"""
+Buffered output for streamed tokens.
+
+Flushing the terminal after every chunk costs a syscall per token, so
+StreamWriter flushes only on newlines or once FLUSH_INTERVAL has passed.
+"""
+
+import sys
+import time
+from typing import Optional, TextIO
+
+# Flush streamed output at least this often (seconds), roughly one frame
+FLUSH_INTERVAL = 0.016
+
+# ANSI colours applied once around a whole stream of raw tokens
+GREEN = "\033[32m"
+CYAN = "\033[36m"
+RESET = "\033[0m"
+
+
+class StreamWriter:
+    """
+    Writes streamed tokens straight to a file (stdout by default).
+
+    If ``color`` is given, it is written once on entering the writer as a
+    context manager and reset on exit, instead of styling every token.
+    """
+
+    def __init__(self, out: Optional[TextIO] = None, color: Optional[str] = None) -> None:
+        self.out = out if out is not None else sys.stdout
+        self.color = color
+        self.last_flush = time.monotonic()
+
+    def __enter__(self) -> "StreamWriter":
+        if self.color:
+            self.out.write(self.color)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self.color:
+            self.out.write(RESET)
+        self.flush()
+
+    def write(self, content: str) -> None:
+        self.out.write(content)
+        now = time.monotonic()
+        if "\n" in content or now - self.last_flush > FLUSH_INTERVAL:
+            self.out.flush()
+            self.last_flush = now
+
+    def flush(self) -> None:
+        self.out.flush()
+        self.last_flush = time.monotonic()